@@ -1,23 +1,70 @@
 import re
+import string
 import sys
 import argparse
+import hashlib
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from operator import attrgetter
 from pathlib import Path
 from datetime import datetime
 import csv
 
+# Prefer PyMuPDF (fitz) for text extraction - its C-based parser is roughly
+# 10x faster than pure-Python PyPDF2 on these receipts. Fall back to PyPDF2.
+try:
+    import fitz
+except ImportError:
+    fitz = None
+
 try:
     import PyPDF2
 except ImportError:
-    print("PyPDF2 not installed. Install with: pip install PyPDF2")
+    PyPDF2 = None
+
+if fitz is None and PyPDF2 is None:
+    print("No PDF library installed. Install with: pip install PyMuPDF (or PyPDF2)")
     sys.exit(1)
 
 # Global verbose flag
 VERBOSE = False
 
-# Pre-compile regex patterns for performance
-PRICE_PATTERN = re.compile(r'Standard\s+DKK\s+([\d.]+)')
-JOURNEY_PATTERN = re.compile(r'(\d{2}:\d{2})\s+([^→]+?)\s*→\s*([^S]+?)(\d{2}:\d{2})')
-NEXT_JOURNEY_PATTERN = re.compile(r'\n\d{2}:\d{2}\s+\S')
+# Column order for CSV export
+CSV_FIELDNAMES = ['date', 'departure_time', 'arrival_time', 'origin', 'destination', 'traveller_name', 'traveller_type', 'price']
+
+# Pre-compile regex patterns for performance.
+#
+# Every marker the receipt parser cares about is one alternative of a single
+# combined pattern, so the whole document is tokenized in one linear sweep
+# instead of one scan per marker. The journey alternative is anchored on ^
+# ("HH:MM Origin → Destination HH:MM" always starts a line) with bounded
+# location classes so the regex engine cannot backtrack across long
+# stretches of text; excluding → from both location groups stops a match
+# from running into the next journey.
+MASTER_PATTERN = re.compile(
+    r'(?P<price>Standard\s+DKK\s+(?P<amount>[\d.]+))'
+    r'|(?P<journey>^(?P<dep>\d{2}:\d{2})\s+(?P<orig>[^→]{1,100}?)\s*→\s*(?P<dest>[^→]{1,100}?)(?P<arr>\d{2}:\d{2}))'
+    r'|(?P<subtotal>Subtotal)'
+    r'|(?P<travellers>Travellers)'
+    r'|(?P<header>Journeys)',
+    re.MULTILINE
+)
+DEST_TIME_RE = re.compile(r'^\d{2}:\d{2}\s+')
+PDF_CREATION_DATE_RE = re.compile(r'(?:D:)?(\d{4})(\d{2})(\d{2})')
+# Invoice-line date patterns, in priority order
+DATE_PATTERNS = (
+    re.compile(r'Invoice\s*[–-]\s*(\d{2}\s+\w{3,}\s+\d{4})', re.IGNORECASE),
+    re.compile(r'Overview\s+(\d{2}\s+\w{3,}\s+\d{4})', re.IGNORECASE),
+)
+DANISH_DATE_RE = re.compile(r'(\d{2})\s+(jan|feb|mar|apr|maj|jun|jul|aug|sep|okt|nov|dec)\s+(\d{4})', re.IGNORECASE)
+FILENAME_DATE_RE = re.compile(r'(\d{4})-(\d{2})-(\d{2})')
+
+# Characters considered normal in location names; everything else counts as
+# "special" for the garbage-data check. The deletion table lets a single
+# C-level str.translate call strip the normal characters so that what
+# remains is exactly the special ones.
+ALLOWED_LOCATION_CHARS = string.ascii_letters + string.digits + ' \t\n()-/,æøåÆØÅ'
+LOCATION_DEL_TABLE = str.maketrans('', '', ALLOWED_LOCATION_CHARS)
 
 # Traveller types with case-insensitive matching
 TRAVELLER_TYPES = {
@@ -30,64 +77,141 @@ TRAVELLER_TYPES = {
     'pensionist': 'Senior'
 }
 
+# Single alternation matching any traveller type in one scan (longest keys
+# first so 'young person' is preferred over a shorter overlapping key)
+TYPE_RE = re.compile(
+    r'\b(' + '|'.join(re.escape(k) for k in sorted(TRAVELLER_TYPES, key=len, reverse=True)) + r')\b',
+    re.IGNORECASE
+)
+
+
+@dataclass
+class Journey:
+    """
+    One parsed journey.
+
+    __slots__ keeps the fields packed (no per-instance dict), which makes
+    attribute access, sorting and summing cheaper than dict lookups.
+    """
+    __slots__ = ('date', 'departure_time', 'arrival_time', 'origin',
+                 'destination', 'traveller_name', 'traveller_type', 'price')
+    date: str
+    departure_time: str
+    arrival_time: str
+    origin: str
+    destination: str
+    traveller_name: str
+    traveller_type: str
+    price: float
+
+    @property
+    def route(self):
+        return f"{self.origin} → {self.destination}"
+
 
 def extract_text_from_pdf(pdf_path):
-    """Extract text from a PDF file."""
-    with open(pdf_path, 'rb') as file:
-        pdf_reader = PyPDF2.PdfReader(file)
-        text = ""
-        for page in pdf_reader.pages:
-            text += page.extract_text()
-    
+    """
+    Extract text from a PDF file (PyMuPDF if available, PyPDF2 otherwise).
+
+    The document is parsed exactly once; the creation date from the PDF
+    metadata is returned alongside the text so callers never need to
+    reopen and reparse the file for it.
+
+    Returns:
+        tuple: (text, creation_date) where creation_date is the raw
+               metadata string (e.g. "D:20260103120000+01'00'") or None
+    """
+    if fitz is not None:
+        doc = fitz.open(pdf_path)
+        text = "\n".join(page.get_text("text") for page in doc)
+        creation_date = (doc.metadata or {}).get('creationDate') or None
+        doc.close()
+    else:
+        with open(pdf_path, 'rb') as file:
+            pdf_reader = PyPDF2.PdfReader(file)
+            # Accumulate per-page text and join once; += rebuilds the whole
+            # string every iteration, which is quadratic on large PDFs.
+            parts = [page.extract_text() for page in pdf_reader.pages]
+            text = "".join(parts)
+            metadata = pdf_reader.metadata
+            creation_date = metadata.get('/CreationDate') if metadata else None
+
     # Replace non-breaking spaces with regular spaces
     text = text.replace('\xa0', ' ')
-    
-    return text
+
+    return text, creation_date
 
 
-def validate_location(location):
+def clean_and_check_location(location):
     """
-    Validate that a location string is reasonable.
-    
+    Normalize whitespace in a location name and validate the result.
+
+    One fused helper instead of separate cleanup and validation passes:
+    split/join collapses whitespace runs and trims the ends, then length
+    and the special-character ratio are checked on the cleaned string.
+    Every scan runs in C (str.split, str.join, str.translate).
+
     Returns:
-        tuple: (is_valid, reason)
+        tuple: (cleaned, is_valid, reason)
     """
-    if not location or len(location) < 3:
-        return False, "Too short"
-    if len(location) > 100:
-        return False, "Too long"
-    
+    cleaned = ' '.join(location.split())
+
+    if len(cleaned) < 3:
+        return cleaned, False, "Too short"
+    if len(cleaned) > 100:
+        return cleaned, False, "Too long"
+
     # Check for too many special characters (might be parsing garbage)
-    special_chars = sum(1 for c in location if not (c.isalnum() or c.isspace() or c in '()-/,æøåÆØÅ'))
-    if special_chars > len(location) * 0.3:
-        return False, "Too many special characters"
-    
-    return True, "OK"
+    special_chars = len(cleaned.translate(LOCATION_DEL_TABLE))
+    if special_chars > len(cleaned) * 0.3:
+        return cleaned, False, "Too many special characters"
+
+    return cleaned, True, "OK"
+
 
+# Cache of extracted dates keyed by a digest of the receipt text, so
+# re-parsing the same text (re-runs, duplicate files) skips the regex passes
+_DATE_CACHE = {}
 
-def extract_date_robust(text, filename=None):
+
+def extract_date_robust(text, filename=None, creation_date=None):
     """
     Extract date with multiple fallback strategies.
-    
+
     Supports:
     - English month names (Jan, Feb, etc.)
     - Danish month names (jan, feb, mar, etc.)
+    - PDF metadata creation date (already available from text extraction)
     - Date from filename as last resort
-    
+
+    Results are memoized per (text, filename, creation_date), keyed by a
+    short content digest rather than the full text.
+
     Returns:
         str: Date in YYYY-MM-DD format or "Unknown"
     """
-    # Try multiple date patterns
-    patterns = [
-        r'Invoice\s*[–-]\s*(\d{2}\s+\w{3,}\s+\d{4})',
-        r'Overview\s+(\d{2}\s+\w{3,}\s+\d{4})',
-    ]
-    
-    for pattern in patterns:
-        match = re.search(pattern, text, re.IGNORECASE)
+    key = (hashlib.blake2b(text.encode(), digest_size=8).digest(),
+           str(filename), creation_date)
+    if key in _DATE_CACHE:
+        return _DATE_CACHE[key]
+
+    date_str = _extract_date(text, filename, creation_date)
+
+    if len(_DATE_CACHE) >= 256:
+        _DATE_CACHE.clear()
+    _DATE_CACHE[key] = date_str
+
+    return date_str
+
+
+def _extract_date(text, filename, creation_date):
+    """Uncached date extraction; see extract_date_robust."""
+    # Try the invoice/overview date patterns in priority order
+    for pattern in DATE_PATTERNS:
+        match = pattern.search(text)
         if match:
             date_str = match.group(1)
-            
+
             # Try English month format
             for fmt in ['%d %b %Y', '%d. %b %Y']:
                 try:
@@ -101,10 +225,9 @@ def extract_date_robust(text, filename=None):
                     return date_obj.strftime('%Y-%m-%d')
                 except ValueError:
                     continue
-    
+
     # Try Danish month names
-    danish_pattern = r'(\d{2})\s+(jan|feb|mar|apr|maj|jun|jul|aug|sep|okt|nov|dec)\s+(\d{4})'
-    danish_match = re.search(danish_pattern, text, re.IGNORECASE)
+    danish_match = DANISH_DATE_RE.search(text)
     if danish_match:
         danish_months = {
             'jan': 1, 'feb': 2, 'mar': 3, 'apr': 4, 'maj': 5, 'jun': 6,
@@ -128,9 +251,26 @@ def extract_date_robust(text, filename=None):
             except ValueError:
                 pass
     
+    # Fall back to the PDF metadata creation date; the receipt is generated
+    # on the invoice date, so this is a close approximation of it
+    if creation_date:
+        meta_match = PDF_CREATION_DATE_RE.search(str(creation_date))
+        if meta_match:
+            date_str = f"{meta_match.group(1)}-{meta_match.group(2)}-{meta_match.group(3)}"
+            try:
+                date_obj = datetime.strptime(date_str, '%Y-%m-%d')
+                current_year = datetime.now().year
+                if date_obj.year < 2020 or date_obj.year > current_year + 1:
+                    print(f"  WARNING: Suspicious date {date_str}")
+                if VERBOSE:
+                    print(f"  DEBUG: Extracted date {date_str} from PDF metadata")
+                return date_str
+            except ValueError:
+                pass
+
     # Last resort: extract from filename
     if filename:
-        file_date_match = re.search(r'(\d{4})-(\d{2})-(\d{2})', str(filename))
+        file_date_match = FILENAME_DATE_RE.search(str(filename))
         if file_date_match:
             print(f"  WARNING: Using date from filename: {filename}")
             return f"{file_date_match.group(1)}-{file_date_match.group(2)}-{file_date_match.group(3)}"
@@ -161,28 +301,21 @@ def parse_travellers_flexible(traveller_info):
             break
         
         # Check if this line contains a type (case-insensitive)
-        found_type = None
-        for type_key, type_value in TRAVELLER_TYPES.items():
-            if type_key in line.lower():
-                found_type = type_value
-                # Extract name by removing the type
-                name = re.sub(type_key, '', line, flags=re.IGNORECASE).strip()
-                break
-        
-        if found_type:
+        type_match = TYPE_RE.search(line)
+
+        if type_match:
             # Name and type on same line
+            found_type = TRAVELLER_TYPES[type_match.group(1).lower()]
+            # Extract name by removing the type
+            name = (line[:type_match.start()] + line[type_match.end():]).strip()
             travellers.append({'name': name if name else "N/A", 'type': found_type})
         else:
             # Might be name on one line, type on next
             if i + 1 < len(lines):
                 next_line = lines[i + 1]
-                next_type = None
-                
-                for type_key, type_value in TRAVELLER_TYPES.items():
-                    if type_key in next_line.lower():
-                        next_type = type_value
-                        break
-                
+                next_match = TYPE_RE.search(next_line)
+                next_type = TRAVELLER_TYPES[next_match.group(1).lower()] if next_match else None
+
                 if next_type:
                     # Name on this line, type on next
                     travellers.append({'name': line, 'type': next_type})
@@ -199,172 +332,235 @@ def parse_travellers_flexible(traveller_info):
     return travellers
 
 
-def parse_rejsekort_receipt(text, filename=None):
-    """Parse Rejsekort receipt text and extract journey information."""
-    journeys = []
-    
-    # Extract invoice date with robust fallbacks
-    invoice_date = extract_date_robust(text, filename)
-    
-    # Find the Journeys section to limit search area
-    journeys_section_start = text.find("Journeys")
-    if journeys_section_start == -1:
-        if VERBOSE:
-            print("  DEBUG: No 'Journeys' section found, searching entire document")
-        journeys_section_start = 0
-    else:
-        if VERBOSE:
-            print(f"  DEBUG: Found 'Journeys' section at position {journeys_section_start}")
-    
-    # Find all price entries
-    price_matches = list(PRICE_PATTERN.finditer(text))
-    
-    # Only consider prices after the Journeys section
-    price_matches = [m for m in price_matches if m.start() > journeys_section_start]
-    
+def _assemble_record(text, record, traveller_end):
+    """
+    Turn an open (journey, price) pair into a journey field tuple once the
+    end of its traveller section is known.
+
+    Returns:
+        tuple: (departure_time, arrival_time, origin, destination,
+                traveller_name, traveller_type, price_string)
+    """
+    match = record['journey']
+
+    departure_time = match.group('dep')
+    origin = match.group('orig').strip()
+    destination_raw = match.group('dest').strip()
+    arrival_time = match.group('arr')
+
+    # Clean up destination (remove any stray time stamps)
+    destination = DEST_TIME_RE.sub('', destination_raw)
+
+    # Clean up and validate location names
+    origin, origin_valid, origin_reason = clean_and_check_location(origin)
+    if not origin_valid:
+        print(f"  WARNING: Suspicious origin '{origin[:50]}...': {origin_reason}")
+
+    destination, dest_valid, dest_reason = clean_and_check_location(destination)
+    if not dest_valid:
+        print(f"  WARNING: Suspicious destination '{destination[:50]}...': {dest_reason}")
+
     if VERBOSE:
-        print(f"  DEBUG: Found {len(price_matches)} price entries")
-    
-    # For each price, work backwards to find the journey details
-    for price_match in price_matches:
-        price = price_match.group(1)
-        
-        # Get text before this price
-        text_before_price = text[journeys_section_start:price_match.start()]
-        
-        # Find the most recent journey pattern before this price
-        matches = list(JOURNEY_PATTERN.finditer(text_before_price))
-        
-        if VERBOSE:
-            print(f"  DEBUG: For price DKK {price}, found {len(matches)} journey patterns")
-        
-        if not matches:
-            print(f"  WARNING: No journey pattern found for price DKK {price}")
-            continue
-        
-        # Take the last match
-        match = matches[-1]
-        
-        # Validate distance between journey and price (should be close)
-        distance = price_match.start() - (journeys_section_start + match.end())
-        if distance > 500:
-            print(f"  WARNING: Journey suspiciously far from price ({distance} chars)")
-        
-        departure_time = match.group(1)
-        origin = match.group(2).strip()
-        destination_raw = match.group(3).strip()
-        arrival_time = match.group(4)
-        
-        # Clean up destination (remove any stray time stamps)
-        destination = re.sub(r'^\d{2}:\d{2}\s+', '', destination_raw)
-        
-        # Clean up location names
-        origin = re.sub(r'\s+', ' ', origin).strip()
-        destination = re.sub(r'\s+', ' ', destination).strip()
-        
-        # Validate locations
-        origin_valid, origin_reason = validate_location(origin)
-        if not origin_valid:
-            print(f"  WARNING: Suspicious origin '{origin[:50]}...': {origin_reason}")
-        
-        dest_valid, dest_reason = validate_location(destination)
-        if not dest_valid:
-            print(f"  WARNING: Suspicious destination '{destination[:50]}...': {dest_reason}")
-        
-        # Find traveller info AFTER this price
-        traveller_start = price_match.end()
-        traveller_section_text = text[traveller_start:]
-        
-        # Find where this journey's traveller section ends
-        next_journey_match = NEXT_JOURNEY_PATTERN.search(traveller_section_text)
-        
-        if next_journey_match:
-            traveller_end = traveller_start + next_journey_match.start()
-        else:
-            # No next journey, look for Subtotal
-            subtotal_pos = text.find("Subtotal", traveller_start)
-            if subtotal_pos != -1:
-                traveller_end = subtotal_pos
-            else:
-                traveller_end = len(text)
-        
-        traveller_section = text[traveller_start:traveller_end]
-        
-        if VERBOSE:
-            print(f"  DEBUG: Traveller section length: {len(traveller_section)} chars")
-        
-        # Extract traveller info
-        traveller_pattern = r'Travellers\s+(.+)'
-        traveller_match = re.search(traveller_pattern, traveller_section, re.DOTALL)
-        
-        if not traveller_match:
+        print(f"  DEBUG: Traveller section length: {traveller_end - record['start']} chars")
+
+    travellers_pos = record['travellers_pos']
+
+    if travellers_pos is None:
+        traveller_display = "N/A"
+        traveller_type_display = "Unknown"
+    else:
+        traveller_info = text[travellers_pos + len("Travellers"):traveller_end].strip()
+
+        # Parse traveller information with flexible format support
+        travellers = parse_travellers_flexible(traveller_info)
+
+        # Create formatted string of travelers
+        if len(travellers) == 0:
             traveller_display = "N/A"
             traveller_type_display = "Unknown"
+        elif len(travellers) == 1:
+            traveller_display = travellers[0]['name']
+            traveller_type_display = travellers[0]['type']
         else:
-            traveller_info = traveller_match.group(1).strip()
-            
-            # Parse traveller information with flexible format support
-            travellers = parse_travellers_flexible(traveller_info)
-            
-            # Create formatted string of travelers
-            if len(travellers) == 0:
-                traveller_display = "N/A"
-                traveller_type_display = "Unknown"
-            elif len(travellers) == 1:
-                traveller_display = travellers[0]['name']
-                traveller_type_display = travellers[0]['type']
-            else:
-                # Filter out empty names before joining
-                names = [t['name'] for t in travellers if t['name'] and t['name'] != "N/A"]
-                types = [t['type'] for t in travellers if t['type']]
-                
-                traveller_display = " + ".join(names) if names else "N/A"
-                traveller_type_display = " + ".join(types) if types else "Unknown"
-        
-        journey = {
-            'date': invoice_date,
-            'departure_time': departure_time,
-            'arrival_time': arrival_time,
-            'origin': origin,
-            'destination': destination,
-            'traveller_name': traveller_display,
-            'traveller_type': traveller_type_display,
-            'price': float(price),
-            'route': f"{origin} → {destination}"
-        }
-        journeys.append(journey)
-    
-    return journeys
+            # Filter out empty names before joining
+            names = [t['name'] for t in travellers if t['name'] and t['name'] != "N/A"]
+            types = [t['type'] for t in travellers if t['type']]
+
+            traveller_display = " + ".join(names) if names else "N/A"
+            traveller_type_display = " + ".join(types) if types else "Unknown"
+
+    return (departure_time, arrival_time, origin, destination,
+            traveller_display, traveller_type_display, record['price'])
+
+
+def parse_rejsekort_receipt(text, filename=None, creation_date=None):
+    """
+    Parse Rejsekort receipt text and extract journey information.
+
+    The document is tokenized in a single MASTER_PATTERN sweep; a small
+    state machine tracks the most recent journey line, opens a record per
+    price, attaches the following Travellers marker, and closes records
+    at the next journey or Subtotal boundary.
+    """
+    # Extract invoice date with robust fallbacks
+    invoice_date = extract_date_robust(text, filename, creation_date)
+
+    records = []        # finished field tuples, in document order
+    open_records = []   # prices still waiting for their section boundary
+    last_journey = None
+    seen_header = False
+    journey_count = 0
+    price_count = 0
+
+    def close_open_records(end):
+        for record in open_records:
+            records.append(_assemble_record(text, record, end))
+        open_records.clear()
+
+    for token in MASTER_PATTERN.finditer(text):
+        if token.group('journey') is not None:
+            journey_count += 1
+            close_open_records(token.start())
+            last_journey = token
+
+        elif token.group('price') is not None:
+            price_count += 1
+            price = token.group('amount')
+
+            if last_journey is None:
+                print(f"  WARNING: No journey pattern found for price DKK {price}")
+                continue
 
+            if VERBOSE:
+                print(f"  DEBUG: For price DKK {price}, using journey at position {last_journey.start()}")
+
+            # Validate distance between journey and price (should be close)
+            distance = token.start() - last_journey.end()
+            if distance > 500:
+                print(f"  WARNING: Journey suspiciously far from price ({distance} chars)")
+
+            open_records.append({
+                'journey': last_journey,
+                'price': price,
+                'start': token.end(),
+                'travellers_pos': None
+            })
 
-def process_pdfs(pdf_paths):
-    """Process multiple PDF files and extract all journey information."""
+        elif token.group('travellers') is not None:
+            for record in open_records:
+                if record['travellers_pos'] is None:
+                    record['travellers_pos'] = token.start()
+
+        elif token.group('subtotal') is not None:
+            close_open_records(token.start())
+
+        elif not seen_header:
+            # First "Journeys" header: the journey table starts here, so
+            # anything matched before it (page header/footer noise) is dropped
+            seen_header = True
+            last_journey = None
+            open_records.clear()
+            records.clear()
+            journey_count = 0
+            price_count = 0
+            if VERBOSE:
+                print(f"  DEBUG: Found 'Journeys' section at position {token.start()}")
+
+    close_open_records(len(text))
+
+    if VERBOSE:
+        if not seen_header:
+            print("  DEBUG: No 'Journeys' section found, searching entire document")
+        print(f"  DEBUG: Found {price_count} price entries")
+        print(f"  DEBUG: Found {journey_count} journey patterns")
+
+    # Build the Journey objects in one pass; float conversion stays batched
+    return [Journey(
+        date=invoice_date,
+        departure_time=departure_time,
+        arrival_time=arrival_time,
+        origin=origin,
+        destination=destination,
+        traveller_name=traveller_name,
+        traveller_type=traveller_type,
+        price=float(price)
+    ) for (departure_time, arrival_time, origin, destination,
+           traveller_name, traveller_type, price) in records]
+
+
+def _init_worker(verbose):
+    """Propagate the verbose flag into worker processes."""
+    global VERBOSE
+    VERBOSE = verbose
+
+
+def _process_one(pdf_path):
+    """
+    Extract and parse a single PDF in a worker process.
+
+    Returns:
+        tuple: (journeys, text_preview, error) where error is None on
+               success or (message, traceback_string) on failure
+    """
+    try:
+        text, creation_date = extract_text_from_pdf(pdf_path)
+        journeys = parse_rejsekort_receipt(text, pdf_path, creation_date)
+        return journeys, text[:500], None
+    except Exception as e:
+        import traceback
+        return None, None, (str(e), traceback.format_exc())
+
+
+def process_pdfs(pdf_paths, csv_writer=None):
+    """Process multiple PDF files and extract all journey information.
+
+    Each file is independent and CPU-bound (PDF parsing + regex), so files
+    are parsed in parallel worker processes. Results are reported in input
+    order; debug/warning output from workers may interleave.
+
+    When csv_writer is given, each file's journeys are sorted locally and
+    streamed straight to the CSV instead of being accumulated, so peak
+    memory stays at one file's journeys regardless of batch size. The
+    streamed output is then sorted per file rather than globally.
+    """
     all_journeys = []
-    
-    for pdf_path in pdf_paths:
-        print(f"\nProcessing: {pdf_path}")
-        try:
-            text = extract_text_from_pdf(pdf_path)
-            journeys = parse_rejsekort_receipt(text, pdf_path)
-            
+    total_count = 0
+    total_cost = 0.0
+
+    with ProcessPoolExecutor(initializer=_init_worker, initargs=(VERBOSE,)) as executor:
+        for pdf_path, (journeys, text_preview, error) in zip(
+                pdf_paths, executor.map(_process_one, pdf_paths)):
+            print(f"\nProcessing: {pdf_path}")
+
+            if error is not None:
+                message, trace = error
+                print(f"  ERROR processing {pdf_path}: {message}")
+                if VERBOSE:
+                    print(trace)
+                continue
+
             if not journeys:
                 print(f"  WARNING: No journeys extracted.")
                 if VERBOSE:
                     print(f"  DEBUG: First 500 chars of text:")
-                    print(f"  {text[:500]}")
-            
-            all_journeys.extend(journeys)
+                    print(f"  {text_preview}")
+
+            if csv_writer is not None:
+                journeys.sort(key=attrgetter('date', 'departure_time'))
+                write_csv_rows(csv_writer, journeys)
+                total_count += len(journeys)
+                total_cost += sum(j.price for j in journeys)
+            else:
+                all_journeys.extend(journeys)
+
             print(f"  Found {len(journeys)} journey(s)")
-            
+
             if journeys:
-                print(f"  Date: {journeys[0]['date']}")
-                
-        except Exception as e:
-            print(f"  ERROR processing {pdf_path}: {e}")
-            if VERBOSE:
-                import traceback
-                traceback.print_exc()
-    
+                print(f"  Date: {journeys[0].date}")
+
+    if csv_writer is not None:
+        print(f"\nTotal: {total_count} journey(s), Total cost: DKK {total_cost:.2f}")
+
     return all_journeys
 
 
@@ -379,57 +575,55 @@ def display_journeys(journeys):
     print("="*130)
     
     for journey in journeys:
-        time_str = f"{journey['departure_time']}-{journey['arrival_time']}"
-        price_str = f"DKK {journey['price']:.2f}"
-        route = journey['route']
+        time_str = f"{journey.departure_time}-{journey.arrival_time}"
+        price_str = f"DKK {journey.price:.2f}"
+        route = journey.route
         if len(route) > 40:
             route = route[:37] + "..."
-        
-        date_str = journey['date'] if journey['date'] else "Unknown"
-        traveller_name = journey.get('traveller_name', 'N/A')
-        traveller_type = journey.get('traveller_type', 'N/A')
-        
+
+        date_str = journey.date if journey.date else "Unknown"
+        traveller_type = journey.traveller_type
+
         if len(traveller_type) > 20:
             traveller_type = traveller_type[:17] + "..."
-        
-        print(f"{date_str:<12} {time_str:<11} {route:<40} {traveller_name:<20} {traveller_type:<20} {price_str:<10}")
-    
+
+        print(f"{date_str:<12} {time_str:<11} {route:<40} {journey.traveller_name:<20} {traveller_type:<20} {price_str:<10}")
+
     print("="*130)
-    print(f"Total: {len(journeys)} journey(s), Total cost: DKK {sum(j['price'] for j in journeys):.2f}")
+    print(f"Total: {len(journeys)} journey(s), Total cost: DKK {sum(j.price for j in journeys):.2f}")
+
+
+def write_csv_rows(writer, journeys):
+    """Write journeys as CSV rows in CSV_FIELDNAMES order (comma decimal price)."""
+    writer.writerows(
+        (journey.date,
+         journey.departure_time,
+         journey.arrival_time,
+         journey.origin,
+         journey.destination,
+         journey.traveller_name,
+         journey.traveller_type,
+         f"{journey.price:.2f}".replace('.', ','))
+        for journey in journeys
+    )
 
 
 def save_to_csv(journeys, output_file='rejsekort_journeys.csv'):
     """
     Save journey data to CSV file.
-    
+
     Uses UTF-8 with BOM for better Excel compatibility on Windows.
     Uses semicolon delimiter and comma decimal separator for European format.
     """
     if not journeys:
         print("No journeys to save.")
         return
-    
+
     with open(output_file, 'w', newline='', encoding='utf-8-sig') as csvfile:
-        fieldnames = ['date', 'departure_time', 'arrival_time', 'origin', 'destination', 'traveller_name', 'traveller_type', 'price']
-        writer = csv.DictWriter(csvfile, fieldnames=fieldnames, delimiter=';')
-        
-        writer.writeheader()
-        for journey in journeys:
-            # Format price with comma as decimal separator
-            price_formatted = str(journey.get('price', 0.0)).replace('.', ',')
-            
-            row = {
-                'date': journey.get('date', 'Unknown'),
-                'departure_time': journey.get('departure_time', ''),
-                'arrival_time': journey.get('arrival_time', ''),
-                'origin': journey.get('origin', ''),
-                'destination': journey.get('destination', ''),
-                'traveller_name': journey.get('traveller_name', 'N/A'),
-                'traveller_type': journey.get('traveller_type', 'N/A'),
-                'price': price_formatted
-            }
-            writer.writerow(row)
-    
+        writer = csv.writer(csvfile, delimiter=';')
+        writer.writerow(CSV_FIELDNAMES)
+        write_csv_rows(writer, journeys)
+
     print(f"\nData saved to {output_file}")
 
 
@@ -447,11 +641,14 @@ Examples:
   python rejsekort_parser.py file1.pdf file2.pdf # Process specific files
   python rejsekort_parser.py --verbose          # Show detailed debug output
   python rejsekort_parser.py -v file1.pdf       # Verbose mode with specific file
+  python rejsekort_parser.py -o out.csv         # Stream journeys to out.csv while processing
         '''
     )
-    
+
     parser.add_argument('files', nargs='*', help='PDF files to process')
     parser.add_argument('-v', '--verbose', action='store_true', help='Show detailed debug output')
+    parser.add_argument('-o', '--output', metavar='FILE',
+                        help='Stream journeys to CSV FILE while processing (lower memory, sorted per file)')
     
     args = parser.parse_args()
     VERBOSE = args.verbose
@@ -469,9 +666,19 @@ Examples:
         print("\nRun with --help for more information")
         return
     
+    if args.output:
+        # Stream each file's journeys straight to the CSV instead of
+        # accumulating everything and sorting at the end
+        with open(args.output, 'w', newline='', encoding='utf-8-sig') as csvfile:
+            csv_writer = csv.writer(csvfile, delimiter=';')
+            csv_writer.writerow(CSV_FIELDNAMES)
+            process_pdfs(pdf_paths, csv_writer)
+        print(f"\nData saved to {args.output}")
+        return
+
     journeys = process_pdfs(pdf_paths)
-    
-    journeys.sort(key=lambda x: (x['date'], x['departure_time']))
+
+    journeys.sort(key=attrgetter('date', 'departure_time'))
     
     display_journeys(journeys)
     